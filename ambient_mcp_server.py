@@ -5,14 +5,26 @@ A minimal FastMCP server that passively observes conversations and logs insights
 """
 
 import asyncio
-import json
+import atexit
+import itertools
 import logging
+import os
+import threading
 from datetime import datetime
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from dataclasses import dataclass, asdict
-import re
-
+from typing import Any, Dict, List, Optional, Set
+from dataclasses import dataclass, asdict, fields
+
+try:
+    # Linear-time matching on untrusted chat text, no catastrophic backtracking
+    import re2 as re
+    _ASCII_WORDS = 0  # RE2's \b only ever treats ASCII as word characters
+except ImportError:
+    import re
+    _ASCII_WORDS = re.ASCII  # make stdlib \b match RE2's ASCII-only behaviour
+
+import orjson
 from fastmcp import FastMCP
 
 logging.basicConfig(level=logging.INFO)
@@ -21,7 +33,67 @@ logger = logging.getLogger(__name__)
 DATA_DIR = Path("./mcp_data")
 DATA_DIR.mkdir(exist_ok=True)
 
-@dataclass
+TAIL_BLOCK_SIZE = 4096
+RECENT_INSIGHTS_SIZE = 256
+CONTEXT_SAVE_DELAY = 1.0  # seconds to coalesce user context writes
+
+# Detection patterns are compiled once at import and matched against lowercased text.
+# Each yes/no detector is a single alternation so the text is scanned once.
+_LEARNING_RE = re.compile(
+    r"i (?:didn't know|had no idea|never realized)"
+    r"|(?:wow|oh|interesting).{0,20}(?:i|that)"
+    r"|makes sense|i see|i understand"
+    r"|learned|discovered|found out"
+)
+
+_PROBLEM_RE = re.compile(
+    r"how do i|how can i|help me"
+    r"|stuck|confused|struggling"
+    r"|problem|issue|challenge|difficulty"
+    r"|solution|fix|resolve|solve"
+)
+
+# Cheap pre-pass: every string either detector above can match contains one of these
+# literals, so a miss here lets a turn skip both detectors. Keep it a superset of them.
+_CANDIDATE_RE = re.compile(
+    r"i didn't know|i had no idea|i never realized|i see|i understand"
+    r"|wow|oh|interesting|makes sense|learned|discovered|found out"
+    r"|how can i|how do i|help me|stuck|confused|struggling"
+    r"|problem|issue|challenge|difficulty|solution|fix|resolve|solve"
+)
+
+_LIKE_RE = re.compile(r"i (like|love|enjoy|am interested in) ([^.!?]+)")
+
+_TECH_KEYWORDS = [
+    "python", "javascript", "docker", "kubernetes", "ai", "machine learning",
+    "react", "vue", "angular", "nodejs", "rust", "go", "java", "c++",
+    "blockchain", "crypto", "web3", "apis", "databases", "sql"
+]
+
+def _whole_word(keyword: str) -> str:
+    """Escape keyword and anchor it with \\b on each end that is a word character"""
+    pattern = re.escape(keyword)
+    if keyword[0].isalnum():
+        pattern = r"\b" + pattern
+    if keyword[-1].isalnum():
+        pattern += r"\b"
+    return pattern
+
+# Whole-word match of any tech keyword in one pass (longest first so "javascript" beats "java").
+# Only \b anchors are used since RE2 has no lookaround. Word boundaries are ASCII-only under
+# either engine, so a keyword next to a non-ASCII letter still matches (e.g. "ai" in "éai").
+_TECH_RE = re.compile(
+    "|".join(_whole_word(k) for k in sorted(_TECH_KEYWORDS, key=len, reverse=True)),
+    _ASCII_WORDS
+)
+
+# Kept as separate patterns: they capture text and may overlap, and each match is stored
+_PROJECT_RES = [
+    re.compile(r"(?:working on|building|creating|developing) ([^.!?]+)"),
+    re.compile(r"my (?:project|app|website|tool) ([^.!?]+)"),
+]
+
+@dataclass(slots=True, frozen=True)
 class ConversationInsight:
     timestamp: str
     insight_type: str
@@ -29,7 +101,7 @@ class ConversationInsight:
     context: str
     confidence: float
 
-@dataclass
+@dataclass(slots=True)
 class UserContext:
     interests: List[str]
     skills: List[str]
@@ -38,58 +110,37 @@ class UserContext:
     preferences: Dict[str, Any]
     last_updated: str
 
+# Slotted instances have no __dict__; serialize flat insights from their field names
+_INSIGHT_FIELDS = tuple(f.name for f in fields(ConversationInsight))
+
 class InsightDetector:
     """Detects various types of insights from conversation text"""
 
     @staticmethod
-    def detect_learning_moment(text: str) -> Optional[str]:
-        """Detect when user is learning something new"""
-        learning_patterns = [
-            r"i (didn't know|had no idea|never realized)",
-            r"(wow|oh|interesting).{0,20}(i|that)",
-            r"(makes sense|i see|i understand)",
-            r"(learned|discovered|found out)"
-        ]
-
-        for pattern in learning_patterns:
-            if re.search(pattern, text.lower()):
-                return f"Learning moment detected: {text[:100]}..."
+    def detect_learning_moment(text: str, low: Optional[str] = None) -> Optional[str]:
+        """Detect when user is learning something new (`low` is text.lower() if precomputed)"""
+        if _LEARNING_RE.search(text.lower() if low is None else low):
+            return f"Learning moment detected: {text[:100]}..."
         return None
 
     @staticmethod
-    def detect_problem_solving(text: str) -> Optional[str]:
-        """Detect problem-solving discussions"""
-        problem_patterns = [
-            r"(how do i|how can i|help me)",
-            r"(stuck|confused|struggling)",
-            r"(problem|issue|challenge|difficulty)",
-            r"(solution|fix|resolve|solve)"
-        ]
-
-        for pattern in problem_patterns:
-            if re.search(pattern, text.lower()):
-                return f"Problem-solving discussion: {text[:100]}..."
+    def detect_problem_solving(text: str, low: Optional[str] = None) -> Optional[str]:
+        """Detect problem-solving discussions (`low` is text.lower() if precomputed)"""
+        if _PROBLEM_RE.search(text.lower() if low is None else low):
+            return f"Problem-solving discussion: {text[:100]}..."
         return None
 
     @staticmethod
-    def extract_interests(text: str) -> List[str]:
-        """Extract potential user interests from text"""
+    def extract_interests(text: str, low: Optional[str] = None) -> List[str]:
+        """Extract potential user interests from text (`low` is text.lower() if precomputed)"""
         interest_keywords = []
+        if low is None:
+            low = text.lower()
 
-        like_pattern = r"i (like|love|enjoy|am interested in) ([^.!?]+)"
-        matches = re.findall(like_pattern, text.lower())
-        for _, interest in matches:
-            interest_keywords.append(interest.strip())
+        for match in _LIKE_RE.finditer(low):
+            interest_keywords.append(match.group(2).strip())
 
-        tech_keywords = [
-            "python", "javascript", "docker", "kubernetes", "ai", "machine learning",
-            "react", "vue", "angular", "nodejs", "rust", "go", "java", "c++",
-            "blockchain", "crypto", "web3", "apis", "databases", "sql"
-        ]
-
-        for keyword in tech_keywords:
-            if keyword in text.lower():
-                interest_keywords.append(keyword)
+        interest_keywords.extend(match.group() for match in _TECH_RE.finditer(low))
 
         return list(set(interest_keywords))
 
@@ -98,21 +149,74 @@ class AmbientInsightsServer:
         self.insights_file = DATA_DIR / "insights.jsonl"
         self.context_file = DATA_DIR / "user_context.json"
         self.detector = InsightDetector()
+        self._context: Optional[UserContext] = None
+        # Hash sets mirroring the list fields of the cached context, for O(1) dedup
+        self._member_sets: Dict[str, Set[str]] = {}
+        # Most recent insights in append order, seeded from the end of the log
+        self._recent: deque = deque(maxlen=RECENT_INSIGHTS_SIZE)
+        if self.insights_file.exists():
+            lines = self._read_tail_lines(self.insights_file, RECENT_INSIGHTS_SIZE)
+            self._recent.extend(self._decode_insight_lines(lines))
+        # Raw O_APPEND descriptor: each insight line is normally one atomic write, no Python buffering
+        self._insight_fd: Optional[int] = os.open(
+            self.insights_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+        )
+        self._terminate_partial_line()
+        # Debounced user context writes: save_user_context marks dirty, a timer writes
+        self._context_dirty = False
+        self._context_timer: Optional[threading.Timer] = None
+        self._context_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def close(self):
+        """Write any pending user context and close the insights log"""
+        if self._context_timer is not None:
+            self._context_timer.cancel()
+        self._write_user_context()
+        if self._insight_fd is not None:
+            os.close(self._insight_fd)
+            self._insight_fd = None
 
     def save_insight(self, insight: ConversationInsight):
         """Save an insight to persistent storage"""
-        with open(self.insights_file, "a") as f:
-            f.write(json.dumps(asdict(insight)) + "\n")
+        # ConversationInsight is flat, so a shallow field dict avoids asdict's deep copy
+        data = {name: getattr(insight, name) for name in _INSIGHT_FIELDS}
+        self._write_insight_line(orjson.dumps(data) + b"\n")
+        self._recent.append(data)
         logger.info(f"Saved insight: {insight.insight_type}")
 
+    def _terminate_partial_line(self):
+        """End a trailing fragment (e.g. from a crash mid-append) so new lines don't join it"""
+        with open(self.insights_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            f.seek(size - 1)
+            last = f.read(1)
+        if last != b"\n":
+            logger.warning(f"Insights log {self.insights_file} ends mid-line; terminating it")
+            self._write_insight_line(b"\n")
+
+    def _write_insight_line(self, line: bytes):
+        """Write a full line to the insights log, continuing after short writes"""
+        view = memoryview(line)
+        while view:
+            written = os.write(self._insight_fd, view)
+            if written == 0:
+                raise OSError(f"Short write to {self.insights_file}: {len(view)} bytes unwritten")
+            view = view[written:]
+
     def load_user_context(self) -> UserContext:
-        """Load existing user context or create new one"""
+        """Load existing user context or create new one (read from disk once, then cached)"""
+        if self._context is not None:
+            return self._context
+
         if self.context_file.exists():
-            with open(self.context_file, "r") as f:
-                data = json.load(f)
-                return UserContext(**data)
+            with open(self.context_file, "rb") as f:
+                data = orjson.loads(f.read())
+                self._context = UserContext(**data)
         else:
-            return UserContext(
+            self._context = UserContext(
                 interests=[],
                 skills=[],
                 current_projects=[],
@@ -120,43 +224,77 @@ class AmbientInsightsServer:
                 preferences={},
                 last_updated=datetime.now().isoformat()
             )
+        self._rebuild_member_sets(self._context)
+        return self._context
 
     def save_user_context(self, context: UserContext):
-        """Save user context to persistent storage"""
+        """Save user context to persistent storage (written after CONTEXT_SAVE_DELAY)"""
         context.last_updated = datetime.now().isoformat()
-        with open(self.context_file, "w") as f:
-            json.dump(asdict(context), f, indent=2)
-
-    def update_context_from_text(self, text: str):
-        """Update user context based on conversation text"""
-        context = self.load_user_context()
-
-        new_interests = self.detector.extract_interests(text)
-        for interest in new_interests:
-            if interest not in context.interests:
-                context.interests.append(interest)
-
-        project_patterns = [
-            r"(working on|building|creating|developing) ([^.!?]+)",
-            r"my (project|app|website|tool) ([^.!?]+)"
-        ]
-
-        for pattern in project_patterns:
-            matches = re.findall(pattern, text.lower())
-            for _, project in matches:
-                project = project.strip()
-                if project and project not in context.current_projects:
-                    context.current_projects.append(project)
-
-        self.save_user_context(context)
-
-    def analyze_conversation_turn(self, user_message: str, assistant_response: str):
-        """Analyze a conversation turn for insights"""
-        timestamp = datetime.now().isoformat()
-
-        self.update_context_from_text(user_message)
-
-        learning_insight = self.detector.detect_learning_moment(user_message)
+        with self._context_lock:
+            if context is not self._context:
+                self._context = context
+                self._rebuild_member_sets(context)
+            self._context_dirty = True
+            if self._context_timer is None:
+                self._context_timer = threading.Timer(CONTEXT_SAVE_DELAY, self._write_user_context)
+                self._context_timer.daemon = True
+                self._context_timer.start()
+
+    def _write_user_context(self):
+        """Write the cached user context to disk if it has unsaved changes"""
+        with self._context_lock:
+            self._context_timer = None
+            if not self._context_dirty:
+                return
+            data = orjson.dumps(asdict(self._context), option=orjson.OPT_INDENT_2)
+            self._context_dirty = False
+        with open(self.context_file, "wb") as f:
+            f.write(data)
+
+    def _rebuild_member_sets(self, context: UserContext):
+        self._member_sets = {
+            "interests": set(context.interests),
+            "current_projects": set(context.current_projects),
+            "goals": set(context.goals),
+        }
+
+    def _add_unique(self, context: UserContext, field: str, value: str) -> bool:
+        """Append value to a list field if not already present; returns True when added"""
+        seen = self._member_sets[field]
+        if value in seen:
+            return False
+        seen.add(value)
+        getattr(context, field).append(value)
+        return True
+
+    def add_interest(self, context: UserContext, interest: str) -> bool:
+        return self._add_unique(context, "interests", interest)
+
+    def add_project(self, context: UserContext, project: str) -> bool:
+        return self._add_unique(context, "current_projects", project)
+
+    def add_goal(self, context: UserContext, goal: str) -> bool:
+        return self._add_unique(context, "goals", goal)
+
+    def _update_context_inplace(self, context: UserContext, text: str, low: str) -> bool:
+        """Merge interests and projects found in text into context; returns True if it changed"""
+        changed = False
+        for interest in self.detector.extract_interests(text, low):
+            changed |= self.add_interest(context, interest)
+
+        for pattern in _PROJECT_RES:
+            for match in pattern.finditer(low):
+                project = match.group(1).strip()
+                if project:
+                    changed |= self.add_project(context, project)
+        return changed
+
+    def _detect_insights(self, user_message: str, low: str, timestamp: str):
+        """Run the insight detectors over a message and save any hits"""
+        if not _CANDIDATE_RE.search(low):
+            return
+
+        learning_insight = self.detector.detect_learning_moment(user_message, low)
         if learning_insight:
             insight = ConversationInsight(
                 timestamp=timestamp,
@@ -167,7 +305,7 @@ class AmbientInsightsServer:
             )
             self.save_insight(insight)
 
-        problem_insight = self.detector.detect_problem_solving(user_message)
+        problem_insight = self.detector.detect_problem_solving(user_message, low)
         if problem_insight:
             insight = ConversationInsight(
                 timestamp=timestamp,
@@ -178,15 +316,64 @@ class AmbientInsightsServer:
             )
             self.save_insight(insight)
 
-    def get_recent_insights(self, limit: int = 10) -> List[Dict]:
-        """Get recent insights for context injection"""
+    def analyze_conversation_turn(self, user_message: str, assistant_response: str):
+        """Analyze a conversation turn for insights"""
+        timestamp = datetime.now().isoformat()
+
+        # One context load and at most one (debounced) save per turn
+        low = user_message.lower()
+        context = self.load_user_context()
+        context_changed = self._update_context_inplace(context, user_message, low)
+        self._detect_insights(user_message, low, timestamp)
+        if context_changed:
+            self.save_user_context(context)
+
+    @staticmethod
+    def _read_tail_lines(path: Path, limit: int) -> List[bytes]:
+        """Return up to the last `limit` non-empty lines of a file, reading backwards in blocks"""
+        if limit <= 0:
+            return []
+        with open(path, "rb") as f:
+            pos = os.fstat(f.fileno()).st_size
+            if pos <= TAIL_BLOCK_SIZE:
+                lines = f.read().splitlines()
+            else:
+                # Collect blocks back to front and count newlines per block, so each byte is
+                # read and scanned once; a limit beyond the line count ends as a full read.
+                # Need limit + 1 newlines so the first kept line is known to be complete.
+                blocks = []
+                newlines = 0
+                while pos > 0 and newlines <= limit:
+                    step = min(TAIL_BLOCK_SIZE, pos)
+                    pos -= step
+                    f.seek(pos)
+                    block = f.read(step)
+                    newlines += block.count(b"\n")
+                    blocks.append(block)
+                lines = b"".join(reversed(blocks)).splitlines()
+                if pos > 0:
+                    lines = lines[1:]
+        return [line for line in lines if line.strip()][-limit:]
+
+    def _decode_insight_lines(self, lines: List[bytes]) -> List[Dict]:
+        """Decode JSONL insight lines, skipping any that are undecodable"""
         insights = []
-        if self.insights_file.exists():
-            with open(self.insights_file, "r") as f:
-                for line in f:
-                    insights.append(json.loads(line))
+        for line in lines:
+            try:
+                insights.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                # e.g. a partial line left by a crash mid-append
+                logger.warning(f"Skipping undecodable line in {self.insights_file}: {line[:80]!r}")
+        return insights
 
-        return sorted(insights, key=lambda x: x["timestamp"], reverse=True)[:limit]
+    def get_recent_insights(self, limit: int = 10) -> List[Dict]:
+        """Get recent insights for context injection, newest first"""
+        if limit <= RECENT_INSIGHTS_SIZE:
+            return list(itertools.islice(reversed(self._recent), max(limit, 0)))
+
+        # The log is append-only, so file order is already timestamp order
+        lines = self._read_tail_lines(self.insights_file, limit)
+        return self._decode_insight_lines(lines[::-1])
 
     def get_user_context(self) -> Dict:
         """Get current user context"""
@@ -239,8 +426,7 @@ def add_user_interest(interest: str) -> str:
     """
     try:
         context = insights_server.load_user_context()
-        if interest not in context.interests:
-            context.interests.append(interest)
+        if insights_server.add_interest(context, interest):
             insights_server.save_user_context(context)
             return f"Added interest: {interest}"
         else:
@@ -256,8 +442,7 @@ def set_user_goal(goal: str) -> str:
     """
     try:
         context = insights_server.load_user_context()
-        if goal not in context.goals:
-            context.goals.append(goal)
+        if insights_server.add_goal(context, goal):
             insights_server.save_user_context(context)
             return f"Added goal: {goal}"
         else:
@@ -267,8 +452,6 @@ def set_user_goal(goal: str) -> str:
         return f"Error setting goal: {str(e)}"
 
 if __name__ == "__main__":
-    import os
-
     # Use environment variables for configuration
     host = os.getenv("MCP_HOST", "127.0.0.1")
     port = int(os.getenv("MCP_PORT", "9101"))
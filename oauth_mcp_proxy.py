@@ -4,13 +4,17 @@ Simple OAuth 2.1 proxy for MCP servers with Dynamic Client Registration
 Self-contained implementation using Authlib and Flask
 """
 
+import http.cookiejar
 import json
+import os
 import secrets
+import sys
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from cachetools import LRUCache, TLRUCache, TTLCache
 from flask import Flask, request, jsonify, Response
 from authlib.oauth2 import OAuth2Error
 from authlib.oauth2.rfc6749 import grants
@@ -18,14 +22,28 @@ from authlib.oauth2.rfc7591 import ClientRegistrationEndpoint
 from authlib.oauth2.rfc6749.models import ClientMixin, AuthorizationCodeMixin
 from authlib.integrations.flask_oauth2 import AuthorizationServer
 import requests
+from requests.adapters import HTTPAdapter
+import urllib3
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared keep-alive session for upstream MCP calls
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+SESSION = requests.Session()
+SESSION.verify = False  # Skip SSL verification for localhost
+# Never store upstream Set-Cookie in the shared jar: it would leak to other clients.
+# Each request forwards only its own client's cookies.
+SESSION.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+SESSION.mount('http://', HTTPAdapter(pool_connections=32, pool_maxsize=128))
+SESSION.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=128))
+
 # Simple in-memory storage (use a database in production)
-clients_db = {}
-codes_db = {}
-tokens_db = {}
+# Bounded caches so abandoned registrations, codes and tokens are evicted
+clients_db = LRUCache(maxsize=10000)
+codes_db = TTLCache(maxsize=10000, ttl=600, timer=time.time)  # matches AuthorizationCode.is_expired
+# Each token expires at its own 'expires_at'
+tokens_db = TLRUCache(maxsize=10000, ttu=lambda _key, info, _now: info['expires_at'], timer=time.time)
 
 class Client(ClientMixin):
     def __init__(self, client_id, client_secret, **kwargs):
@@ -266,40 +284,35 @@ def issue_token_alt():
 # Handle token exchange at root path (what Claude seems to be using)
 @app.route('/', methods=['POST'])
 def handle_root_post():
-    print(f"ROOT POST - Content-Type: {request.content_type}")
-    print(f"ROOT POST - Form data: {dict(request.form)}")
-    print(f"ROOT POST - JSON data: {request.get_json()}")
-    print(f"ROOT POST - Raw data: {request.get_data()}")
-    print(f"ROOT POST - Headers: {dict(request.headers)}")
+    content_type = request.content_type or ''
+    logger.debug("ROOT POST - Content-Type: %s", content_type)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("ROOT POST - Headers: %s", dict(request.headers))
+        logger.debug("ROOT POST - Raw data: %r", request.get_data())
 
     # Check if this is a token request
-    if request.content_type and 'application/x-www-form-urlencoded' in request.content_type:
-        form_data = request.form
-        if 'grant_type' in form_data and form_data['grant_type'] == 'authorization_code':
-            print("Detected token request, calling authorization.create_token_response()")
+    if 'application/x-www-form-urlencoded' in content_type:
+        # Cache the body first so it is still available if we fall through to the proxy
+        request.get_data()
+        if request.form.get('grant_type') == 'authorization_code':
+            logger.debug("Detected token request, calling authorization.create_token_response()")
             return authorization.create_token_response()
 
     # Otherwise treat as regular proxy request
-    print("Not a token request, proxying to MCP")
+    logger.debug("Not a token request, proxying to MCP")
     return proxy_to_mcp('')
 
 # Proxy to MCP server
 MCP_SERVER_URL = "http://127.0.0.1:9101/mcp"
+PROXY_CHUNK_SIZE = 64 * 1024
 
 def verify_token(token):
     """Verify the access token"""
     if not token:
         return False
 
-    token_info = tokens_db.get(token)
-    if not token_info:
-        return False
-
-    if time.time() > token_info['expires_at']:
-        del tokens_db[token]
-        return False
-
-    return True
+    # Expired tokens are evicted by the cache itself
+    return token in tokens_db
 
 @app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
 @app.route('/', defaults={'path': ''}, methods=['GET', 'PUT', 'DELETE', 'PATCH'])
@@ -324,30 +337,48 @@ def proxy_to_mcp(path):
     # Proxy request to MCP server
     try:
         url = f"{MCP_SERVER_URL}/{path}" if path else MCP_SERVER_URL
-        resp = requests.request(
+        resp = SESSION.request(
             method=request.method,
             url=url,
             headers={k: v for k, v in request.headers if k.lower() != 'host'},
             data=request.get_data(),
             cookies=request.cookies,
             allow_redirects=False,
-            verify=False  # Skip SSL verification for localhost
+            stream=True
         )
 
-        # Return response
+        # Stream the response back; hop-by-hop headers are left to the WSGI server,
+        # which re-chunks the body since no content-length is forwarded
         excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
         headers = [(name, value) for (name, value) in resp.raw.headers.items()
                   if name.lower() not in excluded_headers]
 
-        response = Response(resp.content, resp.status_code, headers)
+        response = Response(resp.iter_content(chunk_size=PROXY_CHUNK_SIZE), resp.status_code, headers)
+        response.call_on_close(resp.close)
         return response
 
     except Exception as e:
         return jsonify({"error": "server_error", "error_description": str(e)}), 500
 
-if __name__ == "__main__":
-    import os
+def gunicorn_argv(host, port, use_ssl):
+    """Build the gunicorn command line for serving this app.
+
+    A single gevent worker is used: client, code and token storage is
+    in-process, so the OAuth flow must stay in one process, while gevent
+    gives it concurrency for long-lived streamable-http connections.
+    """
+    argv = [
+        sys.executable, "-m", "gunicorn",
+        "--worker-class", "gevent",
+        "--workers", "1",
+        "--worker-connections", os.getenv("OAUTH_WORKER_CONNECTIONS", "1000"),
+        "--bind", f"{host}:{port}",
+    ]
+    if use_ssl:
+        argv += ["--certfile", "./certs/fullchain.pem", "--keyfile", "./certs/privkey.pem"]
+    return argv + ["oauth_mcp_proxy:app"]
 
+if __name__ == "__main__":
     # Use environment variables for configuration
     host = os.getenv("OAUTH_HOST", "127.0.0.1")
     port = int(os.getenv("OAUTH_PORT", "9100"))
@@ -355,7 +386,8 @@ if __name__ == "__main__":
 
     if use_ssl and os.path.exists('./certs/fullchain.pem'):
         logger.info(f"Starting OAuth proxy on {host}:{port} with SSL")
-        app.run(host=host, port=port, debug=True, ssl_context=('./certs/fullchain.pem', './certs/privkey.pem'))
+        argv = gunicorn_argv(host, port, use_ssl=True)
     else:
         logger.info(f"Starting OAuth proxy on {host}:{port} without SSL")
-        app.run(host=host, port=port, debug=True)
\ No newline at end of file
+        argv = gunicorn_argv(host, port, use_ssl=False)
+    os.execv(sys.executable, argv)
@@ -32,7 +32,7 @@ def main():
     # Give MCP server time to start
     time.sleep(2)
 
-    # Start OAuth proxy in foreground
+    # Start OAuth proxy in foreground (it execs gunicorn itself)
     try:
         oauth_process = subprocess.Popen([
             sys.executable, "oauth_mcp_proxy.py"